@@ -0,0 +1,115 @@
+import numpy as np
+
+
+STRING_COLUMNS = ['wiki', 'category', 'pagename', 'user']
+BOOL_COLUMNS = ['is_ip', 'revert', 'probably_revert', 'probably_reverted']
+
+
+def write_cache(data, path):
+    """Store the preprocessed frame `data` (see `load_data()`) column by
+    column in a `.npz` file at `path`. String columns are stored as integer
+    codes plus an array of labels.
+    """
+    # Not at the top, so reading a cache does not import pandas.
+    from lib.preprocessing import wikis
+
+    data = data.assign(wiki=wikis(data))
+    arrays = {}
+    for column in STRING_COLUMNS:
+        codes, labels = data[column].factorize()
+        arrays[column + '_codes'] = codes.astype(np.int32)
+        arrays[column + '_labels'] = np.asarray(labels, dtype=str)
+    for column in BOOL_COLUMNS:
+        arrays[column] = data[column].fillna(False).to_numpy(dtype=bool)
+    arrays['change_size'] = data['change_size'].to_numpy(dtype=np.int64)
+    arrays['date'] = data['date'].to_numpy(dtype='datetime64[s]')
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+class Cache(object):
+    """Read access to a cache file written by `write_cache()`. This only
+    needs numpy, so quick summaries do not pay for importing pandas.
+    """
+
+    def __init__(self, path):
+        self._file = np.load(path, allow_pickle=False)
+        # `NpzFile` reads an array again on every access, so keep them.
+        self._arrays = {}
+
+    def __len__(self):
+        return len(self['change_size'])
+
+    def __getitem__(self, column):
+        if column not in self._arrays:
+            self._arrays[column] = self._file[column]
+        return self._arrays[column]
+
+    def codes(self, column):
+        return self[column + '_codes']
+
+    def labels(self, column):
+        return self[column + '_labels']
+
+    def mask(self, category=None):
+        """Boolean mask of all revisions in `category`, or of all revisions
+        if it is `None`. Unknown categories select nothing.
+        """
+        if category is None:
+            return np.ones(len(self), dtype=bool)
+        labels = self.labels('category')
+        found = np.flatnonzero(labels == category)
+        if len(found) == 0:
+            return np.zeros(len(self), dtype=bool)
+        return self.codes('category') == found[0]
+
+    def page_codes(self):
+        """An integer per page of every revision, like
+        `lib.preprocessing.page_codes()`. See `page_label()`.
+        """
+        return (self.codes('wiki').astype(np.int64)
+                * len(self.labels('pagename')) + self.codes('pagename'))
+
+    def page_label(self, code):
+        """The `wiki:pagename` label of a page code."""
+        wiki, pagename = divmod(int(code), len(self.labels('pagename')))
+        return '{}:{}'.format(self.labels('wiki')[wiki],
+                              self.labels('pagename')[pagename])
+
+
+def summary(cache, category=None):
+    """The same numbers as `lib.stats.general_stats()`, computed from the
+    cache for all revisions or only those of `category`.
+    """
+    mask = cache.mask(category)
+    edit_count = int(mask.sum())
+    if edit_count == 0:
+        return {}
+    is_ip = cache['is_ip'][mask]
+    anon_edit_count = int(is_ip.sum())
+    return {
+        "edit_count": edit_count,
+        "page_count": len(np.unique(cache.page_codes()[mask])),
+        "user_count": len(np.unique(cache.codes('user')[mask][~is_ip])),
+        "anon_edit_count": anon_edit_count,
+        "anon_edit_prop": anon_edit_count / edit_count,
+    }
+
+
+def revert_summary(cache, category=None, top=10):
+    """Count marked and probable reverts, and find the `top` pages with the
+    most probable reverts, labelled `wiki:pagename`.
+    """
+    mask = cache.mask(category)
+    probable = cache['probably_revert'] & mask
+    pages = np.bincount(cache.page_codes()[probable])
+    order = np.argsort(-pages, kind='stable')[:top]
+    order = order[pages[order] > 0]
+    return {
+        "edit_count": int(mask.sum()),
+        "revert_count": int((cache['revert'] & mask).sum()),
+        "probable_revert_count": int(probable.sum()),
+        "probably_reverted_count": int(
+            (cache['probably_reverted'] & mask).sum()),
+        "top_pages": [(cache.page_label(i), int(pages[i])) for i in order],
+    }
@@ -0,0 +1,120 @@
+# Heavy dependencies (numpy, pandas) are imported inside the subcommands
+# which need them, so e.g. `--help` starts instantly and `stats` never
+# imports pandas.
+import argparse
+import sys
+
+
+FINGERPRINTS_HELP = ('detect reverts by content hash, cached in this '
+                     'sqlite file (fetches missing hashes from the wiki)')
+
+
+def _print_stats(stats):
+    if not stats:
+        print('No revisions found.')
+        return
+    for key, value in stats.items():
+        if isinstance(value, float):
+            value = f'{value:.3}'
+        print(f'{key}:\t{value}')
+
+
+def load(args):
+    from lib.preprocessing import load_data
+    from lib.stats import general_stats
+
+    instrumented = args.profile or args.memory or args.cprofile
+    result = load_data(args.files or None, fingerprints=args.fingerprints,
+                       profile=args.profile, memory=args.memory,
+                       cprofile=args.cprofile)
+    data, report = result if instrumented else (result, None)
+    _print_stats(general_stats(data))
+    if report is not None:
+        print()
+        print(report.drop(columns='profile', errors='ignore').to_string())
+        if args.cprofile:
+            for stage, stats in report['profile'].items():
+                print(f'\n---- {stage} ----')
+                stats.stream = sys.stdout
+                stats.sort_stats('cumulative').print_stats(args.limit)
+
+
+def convert(args):
+    from lib.cache import write_cache
+    from lib.preprocessing import load_data
+
+    data = load_data(args.files, fingerprints=args.fingerprints)
+    write_cache(data, args.output)
+    print(f'Wrote {len(data)} revisions to {args.output}.')
+
+
+def stats(args):
+    from lib.cache import Cache, summary
+
+    _print_stats(summary(Cache(args.cache), args.category))
+
+
+def reverts(args):
+    from lib.cache import Cache, revert_summary
+
+    result = revert_summary(Cache(args.cache), args.category, args.top)
+    top_pages = result.pop('top_pages')
+    _print_stats(result)
+    if top_pages:
+        print('----')
+        for pagename, count in top_pages:
+            print(f'{count}\t{pagename}')
+
+
+def parser():
+    parser = argparse.ArgumentParser(
+        prog='wikihistory',
+        description='Preprocess and explore crawled wikipedia histories.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser(
+        'load', help='preprocess crawled JSON files and print stats')
+    p.add_argument('files', nargs='*',
+                   help='crawled JSON files (default: most recent results)')
+    p.add_argument('--fingerprints', metavar='DB',
+                   help=FINGERPRINTS_HELP)
+    p.add_argument('--profile', action='store_true',
+                   help='print the time spent in each stage')
+    p.add_argument('--memory', action='store_true',
+                   help='print the peak memory of each stage')
+    p.add_argument('--cprofile', action='store_true',
+                   help='print cProfile stats of each stage')
+    p.add_argument('--limit', type=int, default=15,
+                   help='number of functions per cProfile listing')
+    p.set_defaults(func=load)
+
+    p = commands.add_parser(
+        'convert', help='preprocess crawled JSON files into a cache file')
+    p.add_argument('files', nargs='+', help='crawled JSON files')
+    p.add_argument('-o', '--output', required=True,
+                   help='cache file to write, e.g. results/all.npz')
+    p.add_argument('--fingerprints', metavar='DB',
+                   help=FINGERPRINTS_HELP)
+    p.set_defaults(func=convert)
+
+    p = commands.add_parser('stats', help='print stats from a cache file')
+    p.add_argument('cache', help='cache file written by `convert`')
+    p.add_argument('-c', '--category', help='only this category')
+    p.set_defaults(func=stats)
+
+    p = commands.add_parser('reverts', help='print revert counts')
+    p.add_argument('cache', help='cache file written by `convert`')
+    p.add_argument('-c', '--category', help='only this category')
+    p.add_argument('--top', type=int, default=10,
+                   help='number of pages with the most reverts to list')
+    p.set_defaults(func=reverts)
+    return parser
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+import json
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+from pandas import Series
+
+from lib.locales import DEFAULT_LANG, LOCALES
+
+
+# The revisions API accepts at most 50 revision IDs per request.
+BATCH_SIZE = 50
+
+# Seconds to wait between two API requests, to go easy on the servers.
+REQUEST_DELAY = 1
+
+USER_AGENT = 'wikihistory (https://github.com/ben-tinc/wikihistory)'
+
+
+class FingerprintStore(object):
+    """Local cache of the SHA-1 content hashes of revisions, in a sqlite
+    database at `path`.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS sha1 ('
+            'wiki TEXT, revid INTEGER, sha1 TEXT, PRIMARY KEY (wiki, revid))')
+
+    def get_many(self, wiki, revids):
+        """Return a dict `revid -> sha1` of all cached `revids`."""
+        result = {}
+        revids = [int(r) for r in revids]
+        # Stay below sqlite's limit of variables per statement.
+        for start in range(0, len(revids), 500):
+            chunk = revids[start:start + 500]
+            rows = self.db.execute(
+                'SELECT revid, sha1 FROM sha1 WHERE wiki = ? AND revid IN '
+                '({})'.format(','.join('?' * len(chunk))), [wiki] + chunk)
+            result.update(rows)
+        return result
+
+    def put_many(self, wiki, fingerprints):
+        """Store a dict `revid -> sha1`."""
+        with self.db:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO sha1 VALUES (?, ?, ?)',
+                [(wiki, int(revid), sha1)
+                 for revid, sha1 in fingerprints.items()])
+
+    def close(self):
+        self.db.close()
+
+
+def fetch_sha1(revids, base_url, opener=urlopen, delay=REQUEST_DELAY):
+    """Query the revisions API of the wiki at `base_url` for the SHA-1 of
+    `revids`, `BATCH_SIZE` revisions per request, waiting `delay` seconds
+    between requests. Yield a dict `revid -> sha1` per batch; deleted or
+    hidden revisions are left out.
+    """
+    revids = [int(r) for r in revids]
+    for start in range(0, len(revids), BATCH_SIZE):
+        if start and delay:
+            time.sleep(delay)
+        query = urlencode({
+            'action': 'query',
+            'prop': 'revisions',
+            'revids': '|'.join(map(str, revids[start:start + BATCH_SIZE])),
+            'rvprop': 'ids|sha1',
+            'format': 'json',
+            'formatversion': 2,
+        })
+        request = Request(f'{base_url}/w/api.php?{query}',
+                          headers={'User-Agent': USER_AGENT})
+        with opener(request) as response:
+            data = json.load(response)
+        batch = {}
+        for page in data.get('query', {}).get('pages', []):
+            for revision in page.get('revisions', []):
+                if 'sha1' in revision:
+                    batch[revision['revid']] = revision['sha1']
+        yield batch
+
+
+def fingerprints(data, store, opener=urlopen, base_urls=None,
+                 delay=REQUEST_DELAY):
+    """SHA-1 of every revision in `data`, aligned with its rows. Cached
+    hashes are taken from `store`, all others are fetched and added to it
+    batch by batch, so an interrupted run picks up where it stopped.
+    `base_urls` maps language codes to other wiki URLs than the default.
+
+    If the wiki cannot be reached, the hashes fetched so far are used and
+    all other rows stay `NaN`.
+    """
+    result = Series(np.nan, index=data.index, dtype=object)
+    if 'revid' not in data:
+        # Crawled before revision IDs were recorded.
+        return result
+    wikis = data['wiki'].fillna(DEFAULT_LANG) if 'wiki' in data \
+        else Series(DEFAULT_LANG, index=data.index)
+    revids = pd.to_numeric(data['revid'], errors='coerce')
+    for wiki in wikis.unique():
+        mask = (wikis == wiki).to_numpy() & revids.notna().to_numpy()
+        wanted = revids[mask].astype(np.int64).unique()
+        known = store.get_many(wiki, wanted)
+        missing = [r for r in wanted if r not in known]
+        if missing:
+            base_url = (base_urls or {}).get(
+                wiki, 'https://' + LOCALES[wiki].host)
+            try:
+                for batch in fetch_sha1(missing, base_url, opener, delay):
+                    store.put_many(wiki, batch)
+                    known.update(batch)
+            # HTTP and network errors, or an invalid JSON response.
+            except (OSError, ValueError) as e:
+                print(f'Fetching fingerprints from {base_url} failed: {e}')
+        result.iloc[mask] = revids[mask].astype(np.int64).map(known).to_numpy()
+    return result
+
+
+def known_fingerprints(data):
+    """Boolean array, `True` for every row of `data` whose content hash is
+    known.
+    """
+    if 'sha1' not in data or 'revid' not in data:
+        return np.zeros(len(data), dtype=bool)
+    revids = pd.to_numeric(data['revid'], errors='coerce')
+    return (data['sha1'].notna() & revids.notna()).to_numpy()
+
+
+def _restored(data):
+    """Sort the unique revisions with a known hash by page, oldest first,
+    and find the revision each of them restores. Return
+    • `rows`: the rows of `data` with a known hash,
+    • `rank`: the sorted position of the revision of each of these rows,
+    • `first`: the first row of `data` of every sorted revision,
+    • `restored`: for every sorted revision, the position of the earlier
+      revision it restores, or -1 if it is no revert.
+    """
+    rows = np.flatnonzero(known_fingerprints(data))
+    if len(rows) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return rows, empty, empty, empty
+    wikis = data['wiki'].fillna(DEFAULT_LANG).to_numpy()[rows] \
+        if 'wiki' in data else np.full(len(rows), DEFAULT_LANG, dtype=object)
+    revids = pd.to_numeric(data['revid'], errors='coerce') \
+        .to_numpy()[rows].astype(np.int64)
+    # The same revision is crawled once per category (and subcategory) of
+    # its page, so work on unique revisions and map the results back.
+    inverse, _ = pd.factorize(
+        pd.MultiIndex.from_arrays([wikis, revids]))
+    _, first = np.unique(inverse, return_index=True)
+    uniq_rows = rows[first]
+    pages = wikis[first] + ':' + data['pagename'].to_numpy()[uniq_rows]
+    # Oldest revision of every page first.
+    order = np.lexsort((revids[first], pages))
+    pos = np.arange(len(order))
+    frame = pd.DataFrame({
+        'page': pages[order],
+        'sha1': data['sha1'].to_numpy()[uniq_rows[order]],
+        'pos': pos,
+    })
+
+    # Position of the last earlier revision with the same content. Its
+    # direct predecessor means a null edit, not a revert.
+    earlier = frame.groupby(['page', 'sha1'])['pos'].shift(1).to_numpy()
+    is_revert = ~np.isnan(earlier) & (earlier < pos - 1)
+    restored = np.where(is_revert, earlier, -1).astype(np.int64)
+
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = pos
+    return rows, rank[inverse], uniq_rows[order], restored
+
+
+def identity_reverts(data):
+    """Exact revert detection by content hash. A revision is a revert if
+    it restores the content of an earlier revision of the same page other
+    than its direct predecessor; all revisions in between are reverted.
+
+    Needs `pagename`, `revid` and `sha1` columns. Return two boolean
+    series `(revert, reverted)` aligned with `data`; rows without a hash
+    are `NaN` in both.
+    """
+    rows, rank, first, restored = _restored(data)
+    is_revert = restored >= 0
+    # Mark the ranges between restored and restoring revision. They never
+    # cross page boundaries, so one cumulative sum covers all pages.
+    delta = np.zeros(len(first) + 1, dtype=np.int64)
+    np.add.at(delta, restored[is_revert] + 1, 1)
+    np.add.at(delta, np.flatnonzero(is_revert), -1)
+    is_reverted = np.cumsum(delta)[:-1] > 0
+
+    revert = Series(np.nan, index=data.index, dtype=object)
+    reverted = revert.copy()
+    revert.iloc[rows] = is_revert[rank]
+    reverted.iloc[rows] = is_reverted[rank]
+    return revert, reverted
+
+
+def identity_revert_pairs(data):
+    """Every pair of a revert and a revision it undid, as found by
+    `identity_reverts()`. Return two arrays `(reverter, reverted)` of
+    positional rows of `data`. A revision crawled several times is
+    represented by its first row.
+    """
+    _, _, first, restored = _restored(data)
+    reverts = np.flatnonzero(restored >= 0)
+    starts = restored[reverts] + 1
+    lengths = reverts - starts
+    # All positions from `starts` up to the revert, for all reverts.
+    offsets = np.arange(lengths.sum()) \
+        - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    reverted = np.repeat(starts, lengths) + offsets
+    return first[np.repeat(reverts, lengths)], first[reverted]
+
+
+def add_fingerprints(data, path, opener=urlopen):
+    """Add a `sha1` column to `data`, cached in the database at `path`."""
+    store = FingerprintStore(path)
+    try:
+        return data.assign(sha1=fingerprints(data, store, opener).to_numpy())
+    finally:
+        store.close()
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from pandas import Index, Series
+from scipy import sparse
+
+from lib.fingerprints import identity_revert_pairs, known_fingerprints
+from lib.preprocessing import page_codes, wikis
+
+
+def _factorize(values):
+    codes, uniques = pd.factorize(values)
+    return codes, Index(uniques)
+
+
+def edit_matrix(data):
+    """Build a sparse users x pages matrix of edit counts. Return the
+    matrix together with the user and page labels of its rows and columns.
+    Pages are labelled by `(wiki, pagename)`.
+    """
+    users, user_labels = _factorize(data['user'])
+    pages = pd.MultiIndex.from_arrays([wikis(data), data['pagename']],
+                                      names=['wiki', 'pagename'])
+    page_labels = pages.unique()
+    pages = page_labels.get_indexer(pages)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(data), dtype=np.int64), (users, pages)),
+        shape=(len(user_labels), len(page_labels)))
+    # Repeated (user, page) pairs add up to the edit count.
+    matrix.sum_duplicates()
+    return matrix, user_labels, page_labels
+
+
+def revert_matrix(data, users):
+    """Build a sparse users x users matrix, where entry `(i, j)` counts how
+    often user `i` reverted an edit of user `j`.
+
+    Where content hashes are known, every revision a revert undid counts,
+    see `identity_revert_pairs()`. For all other reverts this falls back to
+    the assumption of `probably_revert()`: the revisions of a page are
+    ordered from newest to oldest, and a revert only undoes the edit in the
+    following row.
+    """
+    reverts = data['probably_revert'] if 'probably_revert' in data \
+        else data['revert']
+    reverts = reverts.fillna(False).astype(bool).values
+    pages = page_codes(data)
+    same_page = np.zeros(len(data), dtype=bool)
+    same_page[:-1] = pages[:-1] == pages[1:]
+    mask = reverts & same_page & ~known_fingerprints(data)
+    exact_reverter, exact_reverted = identity_revert_pairs(data)
+
+    codes = users.get_indexer(data['user'])
+    reverter = np.concatenate([codes[mask], codes[exact_reverter]])
+    reverted = np.concatenate([codes[np.roll(mask, 1)],
+                               codes[exact_reverted]])
+    matrix = sparse.csr_matrix(
+        (np.ones(len(reverter), dtype=np.int64), (reverter, reverted)),
+        shape=(len(users), len(users)))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def gini(matrix):
+    """Gini coefficient of the non-zero entries of every column of a sparse
+    matrix, computed for all columns at once. Columns with less than two
+    non-zero entries have a coefficient of 0.
+    """
+    matrix = sparse.csc_matrix(matrix)
+    matrix.sum_duplicates()
+    counts = np.diff(matrix.indptr)
+    columns = np.repeat(np.arange(matrix.shape[1]), counts)
+    # Sort the values within each column, then rank them from 1..n.
+    order = np.lexsort((matrix.data, columns))
+    values = matrix.data[order].astype(float)
+    ranks = np.arange(len(values)) - np.repeat(matrix.indptr[:-1], counts) + 1
+    n = np.repeat(counts, counts)
+
+    weighted = np.bincount(columns, weights=(2 * ranks - n - 1) * values,
+                           minlength=matrix.shape[1])
+    totals = np.bincount(columns, weights=values, minlength=matrix.shape[1])
+    denominator = counts * totals
+    result = np.zeros(matrix.shape[1])
+    nonzero = denominator > 0
+    result[nonzero] = weighted[nonzero] / denominator[nonzero]
+    return result
+
+
+class EditGraph(object):
+    """Interactions between editors, derived from preprocessed revisions:
+
+    • `edits`: users x pages matrix of edit counts
+    • `reverts`: users x users matrix of revert counts (reverter x reverted)
+
+    Both are `scipy.sparse` CSR matrices, the labels of their rows and
+    columns are in `users` and `pages`.
+    """
+
+    def __init__(self, data):
+        self.edits, self.users, self.pages = edit_matrix(data)
+        self.reverts = revert_matrix(data, self.users)
+        self._edited = (self.edits > 0).astype(np.int64).tocsr()
+
+    def top_coeditors(self, user, n=10):
+        """The `n` users who edited the most pages in common with `user`,
+        with the number of shared pages.
+        """
+        row = self.users.get_loc(user)
+        shared = (self._edited[row] @ self._edited.T).toarray().ravel()
+        shared[row] = 0
+        top = np.argsort(-shared, kind='stable')[:n]
+        top = top[shared[top] > 0]
+        return Series(shared[top], index=self.users[top])
+
+    def revert_count(self, reverter, reverted):
+        """How often `reverter` reverted an edit of `reverted`."""
+        try:
+            i = self.users.get_loc(reverter)
+            j = self.users.get_loc(reverted)
+        except KeyError:
+            return 0
+        return int(self.reverts[i, j])
+
+    def reverted_by(self, user):
+        """Number of reverts of `user`'s edits, per reverting user."""
+        column = self.reverts[:, self.users.get_loc(user)].tocoo()
+        return Series(column.data, index=self.users[column.row]) \
+            .sort_values(ascending=False)
+
+    def editor_concentration(self):
+        """Gini coefficient of the edit counts of each page's editors. 0
+        means all editors contributed equally, values close to 1 mean that
+        few editors account for most of the edits.
+        """
+        return Series(gini(self.edits), index=self.pages)
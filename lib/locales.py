@@ -0,0 +1,52 @@
+from collections import namedtuple
+import re
+
+
+Locale = namedtuple('Locale', [
+    'host',             # e.g. 'de.wikipedia.org'
+    'category_prefix',  # namespace of category pages
+    'date_pattern',     # dates in page histories, with named groups
+    'months',           # month names as matched by `date_pattern`
+    'revert_keywords',  # lower case substrings of revert comments
+])
+
+
+DEFAULT_LANG = 'de'
+
+LOCALES = {
+    # e.g. "12:02, 28. Mär. 2018"
+    'de': Locale(
+        host='de.wikipedia.org',
+        category_prefix='Kategorie',
+        date_pattern=re.compile(
+            r'(?P<hour>\d{2}):(?P<minute>\d{2}), (?P<day>\d{1,2})\. '
+            r'(?P<month>\S{3})\.? (?P<year>\d{4})'),
+        months=['Jan', 'Feb', 'Mär', 'Apr', 'Mai', 'Jun',
+                'Jul', 'Aug', 'Sep', 'Okt', 'Nov', 'Dez'],
+        revert_keywords=['rückgängig', 'zurückgesetzt'],
+    ),
+    # e.g. "12:02, 28 March 2018"
+    'en': Locale(
+        host='en.wikipedia.org',
+        category_prefix='Category',
+        date_pattern=re.compile(
+            r'(?P<hour>\d{2}):(?P<minute>\d{2}), (?P<day>\d{1,2}) '
+            r'(?P<month>[A-Z][a-z]+) (?P<year>\d{4})'),
+        months=['January', 'February', 'March', 'April', 'May', 'June',
+                'July', 'August', 'September', 'October', 'November',
+                'December'],
+        revert_keywords=['undid revision', 'reverted'],
+    ),
+    # e.g. "28 mars 2018 à 12:02"
+    'fr': Locale(
+        host='fr.wikipedia.org',
+        category_prefix='Catégorie',
+        date_pattern=re.compile(
+            r'(?P<day>\d{1,2}) (?P<month>\S+) (?P<year>\d{4}) à '
+            r'(?P<hour>\d{2}):(?P<minute>\d{2})'),
+        months=['janvier', 'février', 'mars', 'avril', 'mai', 'juin',
+                'juillet', 'août', 'septembre', 'octobre', 'novembre',
+                'décembre'],
+        revert_keywords=['annulation', 'révocation', 'révoqué'],
+    ),
+}
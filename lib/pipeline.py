@@ -0,0 +1,98 @@
+import cProfile
+from io import StringIO
+import pstats
+import time
+import tracemalloc
+
+from pandas import DataFrame
+
+
+class Stage(object):
+    """A named step of a `Pipeline`. `func` receives the output of the
+    previous stage (or the pipeline's initial value) and returns the input
+    for the next one.
+    """
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+
+    def __call__(self, data):
+        return self.func(data)
+
+    def __repr__(self):
+        return f'Stage({self.name!r})'
+
+
+class Pipeline(object):
+    """Run a sequence of `Stage`s, optionally measuring every single one.
+
+    With `profile=True`, wall clock time and the number of resulting rows
+    are recorded for each stage. `memory=True` additionally tracks the peak
+    memory allocated during a stage (via `tracemalloc`, which slows things
+    down noticeably), and `cprofile=True` captures a `pstats.Stats` object
+    per stage.
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    def run(self, data=None, profile=False, memory=False, cprofile=False):
+        """Feed `data` through all stages. Return the result, or a tuple
+        `(result, report)` if any kind of instrumentation was requested.
+        See `report()` for the layout of the report.
+        """
+        if not (profile or memory or cprofile):
+            for stage in self.stages:
+                data = stage(data)
+            return data
+
+        records = []
+        for stage in self.stages:
+            data, record = self._run_stage(stage, data, memory, cprofile)
+            records.append(record)
+        return data, self.report(records)
+
+    @staticmethod
+    def report(records):
+        """Build a data frame with one row per stage, indexed by stage name.
+        Columns are `seconds` and `rows`, plus `peak_bytes` and `profile`
+        if memory tracking or cProfile capture were enabled.
+        """
+        return DataFrame(records).set_index('stage')
+
+    def _run_stage(self, stage, data, memory, cprofile):
+        profiler = cProfile.Profile() if cprofile else None
+        # Do not interfere with a trace the caller may be running.
+        started_tracing = memory and not tracemalloc.is_tracing()
+        baseline = 0
+        if started_tracing:
+            tracemalloc.start()
+        elif memory:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            data = stage(data)
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            if memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak -= baseline
+                if started_tracing:
+                    tracemalloc.stop()
+
+        record = {
+            'stage': stage.name,
+            'seconds': seconds,
+            'rows': len(data) if hasattr(data, '__len__') else None,
+        }
+        if memory:
+            record['peak_bytes'] = peak
+        if profiler is not None:
+            record['profile'] = pstats.Stats(profiler, stream=StringIO())
+        return data, record
@@ -6,22 +6,27 @@ import numpy as np
 import pandas as pd
 from pandas import DataFrame, Index, Series
 
+from lib.fingerprints import (
+    add_fingerprints, identity_reverts, known_fingerprints)
+from lib.locales import DEFAULT_LANG, LOCALES
+from lib.pipeline import Pipeline, Stage
 
-DATE_PATTERN = re.compile(r'(\d{2}):(\d{2}), (\d{1,2})\. (\S{3})\.? (\d{4})')
 
-MONTHS = ['Jan', 'Feb', 'Mär', 'Apr', 'Mai', 'Jun',
-          'Jul', 'Aug', 'Sep', 'Okt', 'Nov', 'Dez']
+DATE_PATTERN = LOCALES[DEFAULT_LANG].date_pattern
+
+MONTHS = LOCALES[DEFAULT_LANG].months
+
+
+DEFAULT_FILES = ["results/Geschichte_der_Malerei.json",
+                 "results/Rest.json",]
 
 
 def read(fns=["results/rechtsextremismus.json"]):
-    df = None
+    frames = []
     for fn in fns:
         with open(fn) as f:
-            if df is None:
-                df = DataFrame(json.load(f))
-            else:
-                df = df.append(DataFrame(json.load(f)))
-    return df
+            frames.append(DataFrame(json.load(f)))
+    return pd.concat(frames)
 
 
 def is_IPv4(string):
@@ -43,26 +48,32 @@ def is_IP(string):
 
 
 def parse_size(string):
-    """Given a string like `"(-48)"`, return an `int`
-    of the edit size. It can be null.
+    """Given a string like `"(-48)"` or `"(+1.234)"`, return an `int`
+    of the edit size. It can be null, or already a number (the crawler
+    yields `0` for edits without a size).
     """
-    if string == "null":
-        return 0
+    if not isinstance(string, str):
+        return 0 if pd.isna(string) else int(string)
+    # Thousands separators and typographic minus signs of the wikis.
+    string = re.sub(r'[.,\s\u00a0\u202f]', '', string.strip('()'))
     try:
-        return int(string[1:-1])
+        return int(string.replace('\u2212', '-'))
     except ValueError:
         return 0
 
 
-def parse_date(string):
+def parse_date(string, lang=DEFAULT_LANG):
     """Given a string like `"12:02, 28. M\u00e4r. 2018"`, or
     "`18:33, 1. Apr. 2019`",
-    create a proper python datetime object.
+    create a proper python datetime object. For other wikis than the
+    german one, pass their language code as `lang`, see `lib.locales`.
     """
-    match = re.match(DATE_PATTERN, string)
+    locale = LOCALES[lang]
+    match = re.match(locale.date_pattern, string)
     try:
-        hour, minute, day, mon, year = match.groups()
-        mon = MONTHS.index(mon) + 1
+        hour, minute, day, mon, year = match.group(
+            'hour', 'minute', 'day', 'month', 'year')
+        mon = locale.months.index(mon) + 1
         return dt(int(year), mon, int(day), int(hour), int(minute))
     except Exception as e:
         # Whatever, we return None anyway..
@@ -86,9 +97,15 @@ def revert_heuristic(name, change, cmp_name, cmp_change, early_dt, late_dt,
     return change + cmp_change == 0
 
 
+def _heuristic_columns(data):
+    # Tell apart neighbouring pages of the same name from different wikis.
+    return data[['change_size', 'date', 'revert']].assign(
+        pagename=wikis(data) + ':' + data['pagename'])
+
+
 def probably_revert(data):
     """"""
-    orig = data[['pagename', 'change_size', 'date', 'revert']]
+    orig = _heuristic_columns(data)
     prev = orig.shift(-1).add_prefix('prev_')
     merged = pd.concat([orig, prev], axis=1)
     return merged.apply(
@@ -101,7 +118,7 @@ def probably_revert(data):
 
 def probably_reverted(data):
     """"""
-    orig = data[['pagename', 'change_size', 'date', 'revert']]
+    orig = _heuristic_columns(data)
     next_ = orig.shift(1).add_prefix('next_')
     merged = pd.concat([orig, next_], axis=1)
     return merged.apply(
@@ -117,18 +134,106 @@ def normalize_change_size(data):
     return data
 
 
-def load_data():
-    # Load most recent data.
-    files = ["results/Geschichte_der_Malerei.json",
-             "results/Rest.json",]
-    data = (read(files)
-        .assign(
-            date=lambda x: x['date'].map(parse_date),
-            is_ip=lambda x: x['user'].map(is_IP),
-            change_size=lambda x:x['change_size'].astype(int))
-        .assign(
+def wikis(data):
+    """The `wiki` column of `data`. Revisions crawled before there was one
+    are from the `DEFAULT_LANG` wiki.
+    """
+    if 'wiki' not in data:
+        return Series(DEFAULT_LANG, index=data.index)
+    return data['wiki'].fillna(DEFAULT_LANG)
+
+
+def page_codes(data):
+    """An integer per page of every revision. Pages of the same name in
+    different wikis get different codes.
+    """
+    codes, _ = pd.factorize(
+        pd.MultiIndex.from_arrays([wikis(data), data['pagename']]))
+    return codes
+
+
+def unique_revisions(data, by=()):
+    """Drop repeated rows of the same revision. The crawler yields a
+    revision once for every category its page was found in, and crawls
+    of several files can overlap. With `by`, e.g. `['category']`, keep
+    one row per revision and value of these columns instead.
+    """
+    key = ['pagename', 'user', 'date', 'change_size']
+    key += [column for column in ('wiki', 'revid') if column in data]
+    return data.drop_duplicates(subset=key + list(by))
+
+
+def parse_dates(data):
+    """Parse the `date` column, according to the `wiki` column if the data
+    was crawled from several wikis.
+    """
+    if 'wiki' not in data:
+        return data['date'].map(parse_date)
+    langs = wikis(data)
+    return Series([parse_date(date, lang)
+                   for date, lang in zip(data['date'], langs)],
+                  index=data.index)
+
+
+def parse_fields(data):
+    return data.assign(
+        date=parse_dates,
+        is_ip=lambda x: x['user'].map(is_IP),
+        change_size=lambda x: x['change_size'].map(parse_size))
+
+
+def mark_reverts(data):
+    """Flag probable reverts and the revisions they reverted. Where the
+    content hash of a revision is known (see `add_fingerprints()`), this is
+    exact. The slow heuristic only runs on pages with unknown hashes, and
+    only decides for these revisions.
+    """
+    known = known_fingerprints(data)
+    if not known.any():
+        return data.assign(
             probably_revert=lambda x: probably_revert(x),
             probably_reverted=lambda x: probably_reverted(x),
         )
-    )
-    return data
+    revert, reverted = (flags.to_numpy(copy=True)
+                        for flags in identity_reverts(data))
+    pages = page_codes(data)
+    # The heuristic compares neighbouring revisions, so keep whole pages.
+    heuristic = np.isin(pages, pages[~known])
+    if heuristic.any():
+        subset = data[heuristic]
+        unknown = ~known[heuristic]
+        fill = heuristic & ~known
+        revert[fill] = probably_revert(subset).to_numpy()[unknown]
+        reverted[fill] = probably_reverted(subset).to_numpy()[unknown]
+    return data.assign(probably_revert=revert.astype(bool),
+                       probably_reverted=reverted.astype(bool))
+
+
+def pipeline(files, fingerprints=None):
+    """The stages of `load_data()`, for running them step by step."""
+    stages = [
+        Stage('read', lambda _: read(files)),
+        Stage('parse_fields', parse_fields),
+    ]
+    if fingerprints is not None:
+        stages.append(Stage(
+            'fingerprints', lambda x: add_fingerprints(x, fingerprints)))
+    stages.append(Stage('mark_reverts', mark_reverts))
+    return Pipeline(stages)
+
+
+def load_data(files=None, fingerprints=None, profile=False, memory=False,
+              cprofile=False):
+    """Load and preprocess the crawled data (by default the most recent
+    results). If any of `profile`, `memory` or `cprofile` is set, return a
+    tuple `(data, report)` with a per-stage breakdown instead, see
+    `Pipeline.run()`.
+
+    With `fingerprints` set to the path of a cache database, the content
+    hash of every revision is looked up (and fetched from the wiki, if
+    necessary), and reverts are detected exactly wherever it is known.
+    """
+    if files is None:
+        files = DEFAULT_FILES
+    return pipeline(files, fingerprints).run(
+        profile=profile, memory=memory, cprofile=cprofile)
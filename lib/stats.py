@@ -1,46 +1,23 @@
-"""
-def page_stats(data):
-    entries = [(i["user"], i["pagename"]) for i in data]
-    page_count = len({i[1] for i in entries})
-    s = f"""
-    Anzahl Seiten:\t {page_count}
-    """
-    return s
-
-
-def user_stats(data):
-    # Count number of entries.
-    entry_count = len(data)
-    anon_count = len([i["user"] for i in data if is_IP(i["user"])])
-    reg_count = entry_count - anon_count
-    # Count number of users.
-    user_set = {i["user"] for i in data}
-    all_users = len(user_set)
-    anon_users = len([u for u in user_set if is_IP(u)])
-    reg_users = all_users - anon_users
-
-    s = f"""
-    Anzahl revs:\t {entry_count}
-    # anon. revs:\t {anon_count}
-    # reg. revs:\t {reg_count}
-    % of anon:\t\t {(anon_count / entry_count * 100):.3}%
-    ----
-    Anzahl users:\t {all_users}
-    # anon. users:\t {anon_users}
-    # reg. users:\t {reg_users}
-     % of anon:\t\t {(anon_users / all_users * 100):.3}%
-    """
-    return s
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from scipy.optimize import minimize_scalar
+from scipy.special import zeta
+
+from lib.preprocessing import is_IP, page_codes, unique_revisions, wikis
 
 
-def time_stats(data):
-    entries = [(i['user'], parse_date(i['date'])) for i in data]
-    return ""
+# Smallest tail `fit_power_law()` considers when estimating `xmin`.
+MIN_TAIL_SIZE = 50
 
+# Upper bound for the number of values drawn per batch in `bootstrap_ci()`.
+BOOTSTRAP_BATCH_SIZE = 10 ** 7
 
-def edit_size_stats(data):
-    entries = [(i['user'], parse_size(i['change_size'])) for i in data]
-    return ""
+
+def _is_ip(data):
+    if 'is_ip' in data:
+        return data['is_ip'].astype(bool)
+    return data['user'].map(is_IP)
 
 
 def general_stats(data):
@@ -52,47 +29,180 @@ def general_stats(data):
     • Number of unique users (non-anonymous)
     """
     if len(data) == 0:
-        return  {}
+        return {}
+    is_ip = _is_ip(data)
     edit_count = len(data)
-    page_count = len({e['pagename'] for e in data})
-    user_count = len({e['user'] for e in data if not is_IP(e['user'])})
-    anon_edit_count = len([e for e in data if is_IP(e['user'])])
-    anon_edit_prop = anon_edit_count / edit_count
+    anon_edit_count = int(is_ip.sum())
     return {
         "edit_count": edit_count,
-        "page_count": page_count,
-        "user_count": user_count,
+        "page_count": len(np.unique(page_codes(data))),
+        "user_count": data['user'][~is_ip].nunique(),
         "anon_edit_count": anon_edit_count,
-        "anon_edit_prop": anon_edit_prop,
+        "anon_edit_prop": anon_edit_count / edit_count,
     }
 
 
+def _grouped_stats(data, by):
+    """`general_stats()` for every group of `by`, as a data frame."""
+    is_ip = _is_ip(data)
+    grouped = data.assign(
+        anon=is_ip.astype(int),
+        page=page_codes(data),
+        registered_user=data['user'].where(~is_ip),
+    ).groupby(by)
+    result = DataFrame({
+        "edit_count": grouped.size(),
+        "page_count": grouped['page'].nunique(),
+        "user_count": grouped['registered_user'].nunique(),
+        "anon_edit_count": grouped['anon'].sum(),
+    })
+    result['anon_edit_prop'] = result['anon_edit_count'] / result['edit_count']
+    return result
+
+
 def stats_by_category(data):
+    """`general_stats()` per category, one row each."""
+    return _grouped_stats(data, 'category')
+
+
+def stats_by_page(data):
+    """`general_stats()` per page, one row each, indexed by wiki and page
+    name.
     """
-    • Number of pages per category
-    • Number of edits per category
-    • Number of anonymous edits
-    • Proportion of anonymous edits
-    • Number of unique users (non-anonymous)
+    return _grouped_stats(data.assign(wiki=wikis(data)),
+                          ['wiki', 'pagename'])
+
+
+def edit_size_distribution(data, bins=50, log=True):
+    """Histogram of the absolute edit sizes. Return the counts and the bin
+    edges, like `np.histogram()`. With `log=True`, the bins are spaced
+    logarithmically to account for the heavy tail; edits of size 0 are
+    left out in that case.
     """
-    cats = {e["category"] for e in data}
-    return {
-        cat: general_stats([e for e in data if e['category'] == cat])
-        for cat in cats
-    }
+    sizes = np.abs(data['change_size'].fillna(0).to_numpy(dtype=float))
+    if log:
+        sizes = sizes[sizes > 0]
+        if len(sizes) == 0:
+            return np.zeros(bins, dtype=int), np.zeros(bins + 1)
+        bins = np.logspace(0, np.log10(sizes.max()) + 1e-9, bins + 1)
+    return np.histogram(sizes, bins=bins)
 
 
-def stats_by_page(data):
-    """Accumulate stats by page:
-    • Number of pages per page
-    • Number of edits per page
-    • Number of anonymous edits
-    • Proportion of anonymous edits
-    • Number of unique users (non-anonymous)
+def inter_edit_times(data):
+    """Seconds between consecutive edits of the same page, for all pages.
+    The result is indexed by wiki and page name.
+    """
+    frame = (unique_revisions(data.assign(wiki=wikis(data)))
+        [['wiki', 'pagename', 'date']]
+        .dropna()
+        .sort_values(['wiki', 'pagename', 'date'], kind='stable'))
+    pages = page_codes(frame)
+    dates = pd.to_datetime(frame['date']).to_numpy(dtype='datetime64[s]')
+    deltas = np.diff(dates).astype(np.int64)
+    same_page = pages[1:] == pages[:-1]
+    index = pd.MultiIndex.from_frame(
+        frame[['wiki', 'pagename']][1:][same_page])
+    return Series(deltas[same_page], index=index, name='seconds')
+
+
+def editor_activity(data, registered_only=True):
+    """Number of edits per user, most active users first."""
+    users = data['user']
+    if registered_only:
+        users = users[~_is_ip(data)]
+    return users.value_counts()
+
+
+def _power_law_alpha(tail, xmin):
+    """Exact maximum likelihood exponent of a discrete power law with
+    lower bound `xmin`, normalized by the Hurwitz zeta function.
     """
-    pages = {e['pagename'] for e in data}
+    n = len(tail)
+    log_sum = np.log(tail).sum()
+    result = minimize_scalar(
+        lambda alpha: n * np.log(zeta(alpha, xmin)) + alpha * log_sum,
+        bounds=(1.0001, 10), method='bounded', options={'xatol': 1e-6})
+    return result.x
+
+
+def _power_law_ks(tail, xmin, alpha):
+    """Kolmogorov-Smirnov distance between the tail and the fitted law."""
+    values, counts = np.unique(tail, return_counts=True)
+    empirical = np.cumsum(counts) / len(tail)
+    model = 1 - zeta(alpha, values + 1) / zeta(alpha, xmin)
+    return np.abs(empirical - model).max()
+
+
+def fit_power_law(values, xmin=None):
+    """Maximum likelihood fit of a discrete power law `p(x) ~ x^-alpha` to
+    all `values >= xmin`. Without `xmin`, it is chosen among the observed
+    values (keeping at least `MIN_TAIL_SIZE` of them) to minimize the
+    Kolmogorov-Smirnov distance, following Clauset, Shalizi & Newman
+    (2009). Return a dict with `alpha`, its approximate standard error
+    `sigma`, `xmin`, the number `n` of values in the tail and the KS
+    distance `ks`. Everything but `n` is `NaN` if there is nothing to fit.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[values >= 1]
+    if xmin is None:
+        candidates = np.unique(values)
+        tail_sizes = len(values) - np.searchsorted(np.sort(values), candidates)
+        candidates = candidates[tail_sizes >= min(MIN_TAIL_SIZE, len(values))]
+    else:
+        candidates = [xmin]
+
+    best = {"alpha": np.nan, "sigma": np.nan, "xmin": np.nan, "n": 0,
+            "ks": np.nan}
+    for candidate in candidates:
+        tail = values[values >= candidate]
+        if len(tail) == 0:
+            continue
+        alpha = _power_law_alpha(tail, candidate)
+        ks = _power_law_ks(tail, candidate, alpha)
+        if not ks >= best["ks"]:
+            best = {
+                "alpha": alpha,
+                "sigma": (alpha - 1) / np.sqrt(len(tail)),
+                "xmin": candidate,
+                "n": len(tail),
+                "ks": ks,
+            }
+    return best
+
+
+def fit_lognormal(values):
+    """Maximum likelihood fit of a log-normal distribution to all positive
+    `values`. Return a dict with `mu` and `sigma` of the underlying normal
+    distribution.
+    """
+    logs = np.log(np.asarray(values, dtype=float))
+    logs = logs[np.isfinite(logs)]
     return {
-        page: general_stats([e for e in data if e['pagename'] == page])
-        for page in pages
+        "mu": logs.mean(),
+        "sigma": logs.std(),
+        "n": len(logs),
     }
- """
+
+
+def bootstrap_ci(values, statistic=np.mean, n_resamples=1000,
+                 confidence=0.95, seed=None):
+    """Percentile bootstrap confidence interval of `statistic`, which must
+    accept an `axis` keyword like `np.mean` or `np.median`.
+
+    The resamples are drawn as one matrix per batch and reduced along its
+    rows, so there is no Python loop over single resamples. Batches are
+    capped at `BOOTSTRAP_BATCH_SIZE` values to bound memory.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    rng = np.random.default_rng(seed)
+    batch = max(1, min(n_resamples, BOOTSTRAP_BATCH_SIZE // max(n, 1)))
+    estimates = []
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        samples = values[rng.integers(0, n, size=(size, n))]
+        estimates.append(statistic(samples, axis=1))
+    estimates = np.concatenate(estimates)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(estimates, [tail, 100 - tail])
+    return low, high
@@ -0,0 +1,128 @@
+import os
+
+import pandas as pd
+from pandas import DataFrame
+
+from lib.locales import DEFAULT_LANG
+from lib.preprocessing import is_IP, load_data, unique_revisions, wikis
+
+
+COLUMNS = ['edits', 'anon_edits', 'reverts', 'net_change']
+
+
+def index_path(fn):
+    """Where the index for the data file `fn` is stored, e.g.
+    `results/Rest.json` -> `results/Rest.index.pkl`.
+    """
+    return os.path.splitext(fn)[0] + '.index.pkl'
+
+
+def daily_counts(data, by):
+    """Aggregate preprocessed revisions into one row per value of the
+    columns `by` and day, with the number of edits, anonymous edits,
+    probable reverts and the net change in bytes. Every revision is
+    counted once per group, even if it was crawled repeatedly.
+    """
+    data = unique_revisions(data, by)
+    is_ip = data['is_ip'] if 'is_ip' in data else data['user'].map(is_IP)
+    if 'probably_revert' in data:
+        reverts = data['probably_revert']
+    else:
+        reverts = data['revert']
+    frame = DataFrame({column: data[column].values for column in by})
+    frame = frame.assign(
+        date=pd.to_datetime(data['date']).dt.floor('D').values,
+        edits=1,
+        anon_edits=is_ip.astype(bool).astype(int).values,
+        reverts=reverts.fillna(False).astype(bool).astype(int).values,
+        net_change=data['change_size'].fillna(0).astype(int).values,
+    )
+    return (frame.dropna(subset=['date'])
+        .groupby(by + ['date'])[COLUMNS]
+        .sum()
+        .sort_index())
+
+
+class TimeSeriesIndex(object):
+    """Precomputed daily aggregates per page and per category, so temporal
+    questions can be answered without scanning the raw revisions again.
+
+    A page listed in several categories counts for each of them, but only
+    once for itself. Pages are told apart by wiki and page name.
+    """
+
+    def __init__(self, pages, categories):
+        self._pages = pages
+        self._categories = categories
+
+    @classmethod
+    def build(cls, data):
+        return cls(daily_counts(data.assign(wiki=wikis(data)),
+                                ['wiki', 'pagename']),
+                   daily_counts(data, ['category']))
+
+    @classmethod
+    def load(cls, path):
+        tables = pd.read_pickle(path)
+        return cls(tables['pages'], tables['categories'])
+
+    def save(self, path):
+        pd.to_pickle(
+            {'pages': self._pages, 'categories': self._categories}, path)
+
+    @property
+    def pages(self):
+        """All `(wiki, pagename)` pairs."""
+        return self._pages.index.droplevel('date').unique()
+
+    @property
+    def categories(self):
+        return self._categories.index.unique(level='category')
+
+    def page(self, pagename, start=None, end=None, freq='D',
+             wiki=DEFAULT_LANG):
+        """Time series of `pagename` in `wiki` between `start` and `end`
+        (inclusive), bucketed by `freq` (any pandas offset alias, e.g.
+        `'W'` or `'MS'`). With the default daily buckets, days without
+        edits are left out.
+        """
+        return self._query(self._pages, (wiki, pagename), start, end, freq)
+
+    def category(self, category, start=None, end=None, freq='D'):
+        """Same as `page()`, for all pages of a category."""
+        return self._query(self._categories, category, start, end, freq)
+
+    @staticmethod
+    def _query(table, key, start, end, freq):
+        try:
+            series = table.loc[key]
+        except KeyError:
+            return DataFrame(columns=COLUMNS, index=pd.DatetimeIndex(
+                [], name='date'), dtype=int)
+        series = series.loc[start:end]
+        if freq != 'D':
+            series = series.resample(freq).sum()
+        return series
+
+
+def anon_share(series):
+    """Proportion of anonymous edits per bucket of a queried series."""
+    return series['anon_edits'] / series['edits']
+
+
+def build_index(fn):
+    """Preprocess the data file `fn` and store its index next to it."""
+    index = TimeSeriesIndex.build(load_data([fn]))
+    index.save(index_path(fn))
+    return index
+
+
+def load_index(fn):
+    """Load the index stored for the data file `fn`, building it first if
+    it does not exist or is older than the data.
+    """
+    path = index_path(fn)
+    if (not os.path.exists(path)
+            or os.path.getmtime(path) < os.path.getmtime(fn)):
+        return build_index(fn)
+    return TimeSeriesIndex.load(path)
@@ -0,0 +1,143 @@
+"""Local stand-in for a wiki, serving recorded pages.
+
+Run it on its own with e.g.
+
+    python -m test.replay --port 8000 --latency 0.2
+
+and point the spider at it with `-a hosts="de=http://localhost:8000"`.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+
+RECORDING = os.path.join(os.path.dirname(__file__), 'fixtures', 'replay')
+
+
+def load_recording(directory=RECORDING):
+    """Read the pages of a recording. `manifest.json` maps request paths
+    (including the query string) to files in `directory`.
+    """
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        manifest = json.load(f)
+    pages = {}
+    for path, fn in manifest.items():
+        with open(os.path.join(directory, fn), 'rb') as f:
+            pages[path] = f.read()
+    return pages
+
+
+class ReplayServer(object):
+    """Serve `pages` (request path -> body) over HTTP in a background
+    thread. Unknown paths get a 404.
+
+    Every response is delayed by `latency` seconds. With `error_rate`, that
+    share of the paths answers its first request with a 503, so the crawler
+    has to retry. Which paths fail only depends on `seed`.
+    """
+
+    def __init__(self, pages=None, latency=0, error_rate=0, seed=0,
+                 host='127.0.0.1', port=0):
+        self.pages = load_recording() if pages is None else pages
+        self.latency = latency
+        self.failing = {
+            path for path in self.pages
+            if random.Random(f'{seed}:{path}').random() < error_rate}
+        self.log = []
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def requests_per_second(self):
+        """Rate of requests between the first and the last one served."""
+        if len(self.log) < 2:
+            return 0
+        first, last = self.log[0][0], self.log[-1][0]
+        return (len(self.log) - 1) / max(last - first, 1e-9)
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, path):
+        """Return status and body for a request of `path` and log it."""
+        with self._lock:
+            first = path not in self._seen
+            self._seen.add(path)
+            if path not in self.pages:
+                status = 404
+            elif first and path in self.failing:
+                status = 503
+            else:
+                status = 200
+            self.log.append((time.perf_counter(), path, status))
+        return status, self.pages.get(path, b'') if status == 200 else b''
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if replay.latency:
+                    time.sleep(replay.latency)
+                status, body = replay._respond(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=UTF-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--recording', default=RECORDING,
+                        help='directory with a manifest.json')
+    args = parser.parse_args()
+    server = ReplayServer(load_recording(args.recording), args.latency,
+                          args.error_rate, port=args.port)
+    print(f'Serving {len(server.pages)} pages at {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+from unittest import TestCase
+from contextlib import redirect_stdout
+from datetime import datetime as dt
+from io import StringIO
+import os
+import tempfile
+
+from pandas import DataFrame
+
+from lib.cache import Cache, write_cache, summary, revert_summary
+from lib.cli import main
+from lib.stats import general_stats
+
+
+class CacheTest(TestCase):
+    """Test writing a cache file and summarizing it with numpy only."""
+
+    def setUp(self):
+        self.data = DataFrame([
+            ['Cat 1', 'Name 1', 'User 1', 12, dt(2019, 1, 1, 12), False, True],
+            ['Cat 1', 'Name 1', '127.0.0.1', -12, dt(2019, 1, 1, 10), False,
+             False],
+            ['Cat 1', 'Name 2', 'User 1', 0, None, True, True],
+            ['Cat 2', 'Name 3', 'User 2', 1200, dt(2019, 1, 3, 8), False,
+             False],],
+            columns=['category', 'pagename', 'user', 'change_size', 'date',
+                     'revert', 'probably_revert'])
+        self.data['is_ip'] = [False, True, False, False]
+        self.data['probably_reverted'] = [False, True, False, False]
+        fd, self.fn = tempfile.mkstemp(suffix='.npz')
+        os.close(fd)
+        write_cache(self.data, self.fn)
+        self.cache = Cache(self.fn)
+
+    def tearDown(self):
+        os.remove(self.fn)
+
+    def test_columns(self):
+        self.assertEqual(len(self.cache), 4)
+        self.assertEqual(list(self.cache.labels('category')), ['Cat 1', 'Cat 2'])
+        self.assertEqual(list(self.cache.codes('user')), [0, 1, 0, 2])
+        self.assertEqual(list(self.cache['change_size']), [12, -12, 0, 1200])
+
+    def test_summary(self):
+        self.assertEqual(summary(self.cache), general_stats(self.data))
+        self.assertEqual(
+            summary(self.cache, 'Cat 1'),
+            general_stats(self.data[self.data['category'] == 'Cat 1']))
+        self.assertEqual(summary(self.cache, 'Unknown'), {})
+
+    def test_revert_summary(self):
+        result = revert_summary(self.cache, 'Cat 1')
+        self.assertEqual(result['edit_count'], 3)
+        self.assertEqual(result['revert_count'], 1)
+        self.assertEqual(result['probable_revert_count'], 2)
+        self.assertEqual(result['probably_reverted_count'], 1)
+        self.assertEqual(result['top_pages'],
+                         [('de:Name 1', 1), ('de:Name 2', 1)])
+
+    def test_several_wikis(self):
+        data = self.data.assign(wiki=['de', 'en', 'de', 'de'])
+        write_cache(data, self.fn)
+        cache = Cache(self.fn)
+        self.assertEqual(summary(cache), general_stats(data))
+        self.assertEqual(summary(cache)['page_count'], 4)
+        self.assertEqual(revert_summary(cache, 'Cat 1')['top_pages'],
+                         [('de:Name 1', 1), ('de:Name 2', 1)])
+
+    def test_cli_stats(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            main(['stats', self.fn, '--category', 'Cat 2'])
+        self.assertIn('edit_count:\t1', out.getvalue())
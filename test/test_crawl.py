@@ -0,0 +1,125 @@
+from unittest import TestCase, skipIf
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from lib.cache import Cache, revert_summary, summary
+from test.replay import RECORDING, ReplayServer, load_recording
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RECORDING_EN = os.path.join(os.path.dirname(RECORDING), 'replay_en')
+
+CATEGORIES = {'de': 'Testkategorie', 'en': 'Test_category'}
+
+# Revisions and requests in the recordings of `test/fixtures/replay` and
+# `test/fixtures/replay_en`. Both wikis have a page `Artikel_1`, so there
+# are 5 distinct pages.
+EXPECTED_ITEMS = {'de': 8, 'en': 4}
+EXPECTED_REQUESTS = {'de': 6, 'en': 3}
+EXPECTED_PAGES = 5
+
+# Real crawls wait 3 seconds between two requests to the same wiki. The
+# tests only shorten that delay; all other settings are the shipped ones,
+# i.e. one request at a time per wiki.
+DOWNLOAD_DELAY = 0.3
+
+# With RANDOMIZE_DOWNLOAD_DELAY, the actual delay varies between 0.5 and
+# 1.5 times DOWNLOAD_DELAY. Allow a little jitter of the local servers.
+MIN_GAP = 0.5 * DOWNLOAD_DELAY - 0.02
+
+
+@skipIf(importlib.util.find_spec('scrapy') is None, 'scrapy not installed')
+class ReplayCrawlTest(TestCase):
+    """Run `HistorySpider` end-to-end against `ReplayServer`s."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.output = os.path.join(self.tmp, 'items.json')
+
+    def english_server(self, **kwargs):
+        # Scrapy paces requests per host name, not per port, so the second
+        # wiki needs a host of its own.
+        try:
+            return ReplayServer(load_recording(RECORDING_EN),
+                                host='127.0.0.2', **kwargs)
+        except OSError:
+            self.skipTest('cannot listen on 127.0.0.2')
+
+    def crawl(self, servers, *settings):
+        """Crawl the wikis of `servers` (language code -> server)."""
+        command = [
+            sys.executable, '-m', 'scrapy', 'crawl', 'history',
+            '-a', 'wikis=' + ','.join(servers),
+            '-a', 'cats=' + ','.join(
+                f'{lang}:{CATEGORIES[lang]}' for lang in servers),
+            '-a', 'hosts=' + ','.join(
+                f'{lang}={server.url}' for lang, server in servers.items()),
+            '-s', f'DOWNLOAD_DELAY={DOWNLOAD_DELAY}',
+            '-s', 'LOG_LEVEL=WARNING',
+            '-o', self.output,
+        ]
+        for setting in settings:
+            command += ['-s', setting]
+        subprocess.run(command, cwd=ROOT, check=True, timeout=120)
+        with open(self.output) as f:
+            return json.load(f)
+
+    def assertPaced(self, server):
+        times = [t for t, _, _ in server.log]
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        self.assertGreaterEqual(min(gaps), MIN_GAP)
+
+    def test_crawl(self):
+        with ReplayServer() as de, self.english_server() as en:
+            items = self.crawl({'de': de, 'en': en})
+        for lang, server in [('de', de), ('en', en)]:
+            self.assertEqual(len([i for i in items if i['wiki'] == lang]),
+                             EXPECTED_ITEMS[lang])
+            self.assertEqual(len(server.log), EXPECTED_REQUESTS[lang])
+            self.assertTrue(all(status == 200 for _, _, status in server.log))
+            self.assertPaced(server)
+        # Both wikis are crawled at the same time.
+        self.assertLess(max(de.log[0][0], en.log[0][0]),
+                        min(de.log[-1][0], en.log[-1][0]))
+
+        # Revisions from the second history page keep their metadata.
+        older = [i for i in items if i['date'] == '10:30, 1. Dez. 2018']
+        self.assertEqual(len(older), 1)
+        self.assertEqual(older[0]['pagename'], 'Artikel_1')
+        self.assertEqual(older[0]['category'], 'Testkategorie')
+        subcat = [i for i in items
+                  if i['subcat'] == 'Kategorie:Unterkategorie']
+        self.assertEqual([i['pagename'] for i in subcat], ['Artikel_3'])
+        self.assertEqual(sum(i['revert'] for i in items), 2)
+        self.assertEqual(sorted(i['revid'] for i in items)[:2], [1001, 1002])
+
+        # The crawled file can be preprocessed as is.
+        cache = os.path.join(self.tmp, 'items.npz')
+        subprocess.run([sys.executable, 'wikihistory', 'convert',
+                        self.output, '-o', cache],
+                       cwd=ROOT, check=True, timeout=120,
+                       stdout=subprocess.DEVNULL)
+        cache = Cache(cache)
+        self.assertEqual(summary(cache)['edit_count'], len(items))
+        self.assertEqual(summary(cache)['page_count'], EXPECTED_PAGES)
+        self.assertEqual(revert_summary(cache)['revert_count'], 2)
+        # English thousands separators and minus signs.
+        self.assertIn(1010, cache['change_size'])
+        self.assertIn(-25, cache['change_size'])
+
+    def test_crawl_with_errors(self):
+        """Failing pages are retried, so no items are lost."""
+        with ReplayServer(error_rate=0.5, seed=1) as server:
+            items = self.crawl({'de': server})
+        self.assertTrue(server.failing)
+        self.assertEqual(len(items), EXPECTED_ITEMS['de'])
+        self.assertEqual(len(server.log),
+                         EXPECTED_REQUESTS['de'] + len(server.failing))
+        self.assertPaced(server)
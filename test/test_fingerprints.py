@@ -0,0 +1,149 @@
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import datetime as dt
+from io import BytesIO
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlsplit
+import json
+import os
+import tempfile
+
+from pandas import DataFrame
+
+from lib.fingerprints import (
+    BATCH_SIZE,
+    FingerprintStore,
+    fingerprints,
+    identity_revert_pairs,
+    identity_reverts,
+)
+from lib.preprocessing import mark_reverts, probably_revert
+
+
+class FakeAPI(object):
+    """Stands in for `urlopen()`, answering revisions API queries with
+    the hash `sha-<revid>` and recording every batch of revision IDs.
+    """
+
+    def __init__(self, fail_after=None):
+        self.batches = []
+        self.fail_after = fail_after
+
+    def __call__(self, request):
+        if len(self.batches) == self.fail_after:
+            raise HTTPError(request.full_url, 503, 'Unavailable', {}, None)
+        query = parse_qs(urlsplit(request.full_url).query)
+        revids = [int(r) for r in query['revids'][0].split('|')]
+        self.batches.append(revids)
+        pages = [{'revisions': [{'revid': r, 'sha1': f'sha-{r}'}
+                                for r in revids]}]
+        return BytesIO(json.dumps({'query': {'pages': pages}}).encode())
+
+
+class FingerprintsTest(TestCase):
+    """Test batched fetching and caching of content hashes."""
+
+    def setUp(self):
+        fd, self.fn = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        self.store = FingerprintStore(self.fn)
+        self.data = DataFrame({
+            'revid': list(range(1, 121)) + [None],
+            'wiki': ['de'] * 121,
+        })
+
+    def tearDown(self):
+        self.store.close()
+        os.remove(self.fn)
+
+    def test_batches_and_cache(self):
+        data = self.data
+        api = FakeAPI()
+        result = fingerprints(data, self.store, opener=api, delay=0)
+        self.assertEqual([len(b) for b in api.batches], [50, 50, 20])
+        self.assertTrue(all(len(b) <= BATCH_SIZE for b in api.batches))
+        self.assertEqual(result[0], 'sha-1')
+        self.assertTrue(result.isna()[120])
+
+        # Everything is cached now.
+        api = FakeAPI()
+        again = fingerprints(data, self.store, opener=api, delay=0)
+        self.assertEqual(api.batches, [])
+        self.assertTrue(again.equals(result))
+        self.assertEqual(self.store.get_many('en', [1]), {})
+
+    def test_resume_after_error(self):
+        """Batches fetched before an error are kept and not fetched again."""
+        api = FakeAPI(fail_after=1)
+        result = fingerprints(self.data, self.store, opener=api, delay=0)
+        self.assertEqual(result.notna().sum(), 50)
+
+        api = FakeAPI()
+        result = fingerprints(self.data, self.store, opener=api, delay=0)
+        self.assertEqual([b[0] for b in api.batches], [51, 101])
+        self.assertEqual(result.notna().sum(), 120)
+
+
+class IdentityRevertsTest(TestCase):
+    """Test exact revert detection by content hash."""
+
+    def setUp(self):
+        # Newest first, like the crawled data.
+        self.data = DataFrame([
+            ['Name 1', 6, 'b', dt(2019, 12, 31, 12), 3],
+            ['Name 1', 5, 'a', dt(2019, 12, 30, 12), -7],
+            ['Name 1', 4, 'c', dt(2019, 12, 29, 12), -5],
+            ['Name 1', 3, 'd', dt(2019, 12, 28, 12), 5],
+            ['Name 1', 2, 'a', dt(2019, 12, 27, 12), 0],
+            ['Name 1', 1, 'a', dt(2019, 12, 26, 12), 20],
+            ['Name 2', None, None, dt(2019, 12, 27, 12), -7],
+            ['Name 2', 7, 'a', dt(2019, 12, 26, 12), 7],],
+            columns=['pagename', 'revid', 'sha1', 'date', 'change_size'])
+        self.data['revert'] = False
+
+    def test_identity_reverts(self):
+        revert, reverted = identity_reverts(self.data)
+        # Revision 5 restores 2; revision 2 is a null edit after 1.
+        self.assertEqual(list(revert[:6]),
+                         [False, True, False, False, False, False])
+        self.assertEqual(list(reverted[:6]),
+                         [False, False, True, True, False, False])
+        self.assertTrue(revert.isna()[6])
+        self.assertEqual(revert[7], False)
+
+    def test_identity_revert_pairs(self):
+        reverter, reverted = identity_revert_pairs(self.data)
+        self.assertEqual(sorted(zip(reverter, reverted)), [(1, 2), (1, 3)])
+
+    def test_mark_reverts(self):
+        """The heuristic only runs on pages with unknown hashes, and only
+        decides for those revisions.
+        """
+        with patch('lib.preprocessing.probably_revert',
+                   wraps=probably_revert) as heuristic:
+            result = mark_reverts(self.data)
+        self.assertEqual(list(heuristic.call_args[0][0]['pagename']),
+                         ['Name 2', 'Name 2'])
+        self.assertEqual(list(result['probably_revert']),
+                         [False, True, False, False, False, False, True, False])
+        self.assertEqual(list(result['probably_reverted']),
+                         [False, False, True, True, False, False, False, False])
+
+        # Without any unknown hash, there is no need for the heuristic.
+        with patch('lib.preprocessing.probably_revert') as heuristic:
+            mark_reverts(self.data[:6])
+        heuristic.assert_not_called()
+
+    def test_several_categories(self):
+        """A page crawled for two categories is detected the same in both."""
+        rows = [
+            ['Name 1', 3, 'a', dt(2019, 12, 31, 12)],
+            ['Name 1', 2, 'b', dt(2019, 12, 30, 12)],
+            ['Name 1', 1, 'a', dt(2019, 12, 29, 12)],
+        ]
+        df = DataFrame(
+            [['Cat 1'] + row for row in rows] + [['Cat 2'] + row for row in rows],
+            columns=['category', 'pagename', 'revid', 'sha1', 'date'])
+        revert, reverted = identity_reverts(df)
+        self.assertEqual(list(revert), [True, False, False] * 2)
+        self.assertEqual(list(reverted), [False, True, False] * 2)
@@ -0,0 +1,100 @@
+from unittest import TestCase
+from datetime import datetime as dt
+
+import numpy as np
+from pandas import DataFrame
+from scipy import sparse
+
+from lib.graph import EditGraph, gini
+
+
+class GiniTest(TestCase):
+    """Test the column-wise `gini()` against known values."""
+
+    def test_known_values(self):
+        matrix = sparse.csr_matrix(np.array([
+            [1, 5, 1, 0],
+            [1, 0, 3, 0],
+            [1, 0, 0, 0],
+        ]))
+        result = gini(matrix)
+        # Equal shares, a single editor, [1, 3] and an empty column.
+        np.testing.assert_allclose(result, [0, 0, 0.25, 0])
+
+
+class EditGraphTest(TestCase):
+    """Test the queries of an `EditGraph`."""
+
+    def setUp(self):
+        data = DataFrame([
+            ['Name 1', 'User 2', -12, dt(2019, 12, 31, 12), True],
+            ['Name 1', 'User 1', 12, dt(2019, 12, 30, 12), False],
+            ['Name 1', 'User 1', 8, dt(2019, 12, 29, 12), False],
+            ['Name 2', 'User 3', -5, dt(2019, 12, 31, 12), True],
+            ['Name 2', 'User 1', 5, dt(2019, 12, 30, 12), False],
+            ['Name 2', 'User 2', 5, dt(2019, 12, 29, 12), False],
+            ['Name 3', 'User 3', 5, dt(2019, 12, 29, 12), True],],
+            columns=['pagename', 'user', 'change_size', 'date',
+                     'probably_revert'])
+        self.graph = EditGraph(data)
+
+    def test_edit_matrix(self):
+        self.assertEqual(self.graph.edits.shape, (3, 3))
+        self.assertEqual(self.graph.edits.sum(), 7)
+        i = self.graph.users.get_loc('User 1')
+        j = self.graph.pages.get_loc(('de', 'Name 1'))
+        self.assertEqual(self.graph.edits[i, j], 2)
+
+    def test_revert_count(self):
+        self.assertEqual(self.graph.revert_count('User 2', 'User 1'), 1)
+        self.assertEqual(self.graph.revert_count('User 3', 'User 1'), 1)
+        self.assertEqual(self.graph.revert_count('User 1', 'User 2'), 0)
+        self.assertEqual(self.graph.revert_count('Unknown', 'User 2'), 0)
+        # The last revert has no previous edit on the same page.
+        self.assertEqual(self.graph.reverts.sum(), 2)
+
+    def test_reverted_by(self):
+        result = self.graph.reverted_by('User 1')
+        self.assertEqual(dict(result), {'User 2': 1, 'User 3': 1})
+
+    def test_top_coeditors(self):
+        result = self.graph.top_coeditors('User 1')
+        self.assertEqual(list(result.index), ['User 2', 'User 3'])
+        self.assertEqual(list(result), [2, 1])
+        self.assertEqual(len(self.graph.top_coeditors('User 1', n=1)), 1)
+
+    def test_editor_concentration(self):
+        result = self.graph.editor_concentration()
+        np.testing.assert_allclose(result['de', 'Name 1'], (1 / 6))
+        np.testing.assert_allclose(result['de', 'Name 2'], 0)
+        np.testing.assert_allclose(result['de', 'Name 3'], 0)
+
+    def test_several_wikis(self):
+        """A revert is not attributed to the next row if that is a page of
+        the same name in another wiki.
+        """
+        data = DataFrame([
+            ['de', 'Name 1', 'User 2', -12, dt(2019, 12, 31, 12), True],
+            ['en', 'Name 1', 'User 1', 12, dt(2019, 12, 30, 12), False],],
+            columns=['wiki', 'pagename', 'user', 'change_size', 'date',
+                     'probably_revert'])
+        graph = EditGraph(data)
+        self.assertEqual(list(graph.pages),
+                         [('de', 'Name 1'), ('en', 'Name 1')])
+        self.assertEqual(graph.reverts.sum(), 0)
+
+    def test_identity_reverts(self):
+        """With content hashes, a revert counts against every revision it
+        undid, not only the next one.
+        """
+        data = DataFrame([
+            ['Name 1', 'User 3', 4, 'a', dt(2019, 12, 31, 12), True],
+            ['Name 1', 'User 2', 3, 'c', dt(2019, 12, 30, 12), False],
+            ['Name 1', 'User 1', 2, 'b', dt(2019, 12, 29, 12), False],
+            ['Name 1', 'User 1', 1, 'a', dt(2019, 12, 28, 12), False],],
+            columns=['pagename', 'user', 'revid', 'sha1', 'date',
+                     'probably_revert'])
+        graph = EditGraph(data)
+        self.assertEqual(graph.revert_count('User 3', 'User 2'), 1)
+        self.assertEqual(graph.revert_count('User 3', 'User 1'), 1)
+        self.assertEqual(graph.reverts.sum(), 2)
@@ -0,0 +1,101 @@
+from unittest import TestCase
+import json
+import os
+import pstats
+import tempfile
+import tracemalloc
+
+from pandas import DataFrame
+
+from lib.pipeline import Pipeline, Stage
+from lib.preprocessing import load_data
+
+
+class PipelineTest(TestCase):
+    """Test running and instrumenting a `Pipeline`."""
+
+    def setUp(self):
+        self.pipeline = Pipeline([
+            Stage('create', lambda _: DataFrame({'a': range(10)})),
+            Stage('double', lambda x: x.assign(b=x['a'] * 2)),
+            Stage('filter', lambda x: x[x['b'] > 10]),
+        ])
+
+    def test_plain_run(self):
+        """Without instrumentation, only the result is returned."""
+        result = self.pipeline.run()
+        self.assertEqual(list(result['a']), [6, 7, 8, 9])
+
+    def test_profile(self):
+        """The report has one row per stage, in order."""
+        result, report = self.pipeline.run(profile=True)
+        self.assertEqual(len(result), 4)
+        self.assertEqual(list(report.index), ['create', 'double', 'filter'])
+        self.assertEqual(list(report['rows']), [10, 10, 4])
+        self.assertTrue((report['seconds'] >= 0).all())
+        self.assertNotIn('peak_bytes', report.columns)
+        self.assertNotIn('profile', report.columns)
+
+    def test_memory_and_cprofile(self):
+        """Memory tracking and cProfile capture add their own columns."""
+        _, report = self.pipeline.run(memory=True, cprofile=True)
+        self.assertTrue((report['peak_bytes'] > 0).all())
+        for stats in report['profile']:
+            self.assertIsInstance(stats, pstats.Stats)
+
+
+    def test_memory_keeps_existing_trace(self):
+        """A trace started by the caller keeps running."""
+        tracemalloc.start()
+        try:
+            _, report = self.pipeline.run(memory=True)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        self.assertTrue((report['peak_bytes'] >= 0).all())
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class LoadDataTest(TestCase):
+    """Test `load_data()` with a small file of crawled revisions."""
+
+    def setUp(self):
+        revisions = [
+            {'user': 'Name 1', 'date': '18:33, 1. Apr. 2019',
+             'change_size': '(-12)', 'revert': False, 'pagename': 'Page'},
+            {'user': '127.0.0.1', 'date': '12:02, 28. Mär. 2018',
+             'change_size': '(+12)', 'revert': False, 'pagename': 'Page'},
+            # The crawler yields 0 if there is no size.
+            {'user': 'Name 2', 'date': '09:15, 2. Jan. 2018',
+             'change_size': 0, 'revert': False, 'pagename': 'Page'},
+        ]
+        fd, self.fn = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(revisions, f)
+
+    def tearDown(self):
+        os.remove(self.fn)
+
+    def test_profile(self):
+        data, report = load_data([self.fn], profile=True)
+        self.assertEqual(list(data['change_size']), [-12, 12, 0])
+        self.assertEqual(list(data['is_ip']), [False, True, False])
+        self.assertEqual(list(data['probably_revert']), [True, False, False])
+        self.assertEqual(
+            list(report.index), ['read', 'parse_fields', 'mark_reverts'])
+
+    def test_fingerprints_before_reverts(self):
+        """Reverts are marked after the hashes are looked up, so the
+        heuristic only runs where they are unknown.
+        """
+        fd, db = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        try:
+            # Without revision IDs, no hashes are fetched.
+            data, report = load_data([self.fn], fingerprints=db,
+                                     profile=True)
+        finally:
+            os.remove(db)
+        self.assertEqual(list(report.index), [
+            'read', 'parse_fields', 'fingerprints', 'mark_reverts'])
+        self.assertEqual(list(data['probably_revert']), [True, False, False])
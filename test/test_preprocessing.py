@@ -7,6 +7,7 @@ import numpy as np
 
 from lib.preprocessing import (
     parse_date,
+    parse_dates,
     parse_size,
     is_IP,
     revert_heuristic,
@@ -27,6 +28,22 @@ class ParsingTest(TestCase):
         r = parse_date(s)
         self.assertEqual(r, dt(2019, 4, 1, 18, 33))
 
+    def test_parse_date_locales(self):
+        """Test `parse_date()` with dates of other wikis."""
+        r = parse_date("12:02, 28 March 2018", lang='en')
+        self.assertEqual(r, dt(2018, 3, 28, 12, 2))
+        r = parse_date("28 mars 2018 \u00e0 12:02", lang='fr')
+        self.assertEqual(r, dt(2018, 3, 28, 12, 2))
+        self.assertIsNone(parse_date("12:02, 28 March 2018", lang='de'))
+
+    def test_parse_dates(self):
+        """Dates are parsed according to the `wiki` column."""
+        df = DataFrame({
+            'date': ["12:02, 28. M\u00e4r. 2018", "12:02, 28 March 2018"],
+            'wiki': ['de', 'en'],
+        })
+        result = parse_dates(df)
+        self.assertEqual(list(result), [dt(2018, 3, 28, 12, 2)] * 2)
 
     def test_parse_size(self):
         """Test `parse_size()` with known inputs."""
@@ -36,6 +53,9 @@ class ParsingTest(TestCase):
             ("(987)", 987),
             ("null", 0),
             ("(null)", 0),
+            ("(+1.234)", 1234),
+            ("(\u22121,234)", -1234),
+            (0, 0),
         ]
         for string, result in known:
             self.assertEqual(parse_size(string), result)
@@ -0,0 +1,130 @@
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import datetime as dt
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from lib.stats import (
+    general_stats,
+    stats_by_category,
+    stats_by_page,
+    edit_size_distribution,
+    inter_edit_times,
+    editor_activity,
+    fit_power_law,
+    fit_lognormal,
+    bootstrap_ci,
+)
+
+
+class CountingTest(TestCase):
+    """Test the basic counting functions."""
+
+    def setUp(self):
+        self.data = DataFrame([
+            ['Cat 1', 'Name 1', 'User 1', 12, dt(2019, 1, 1, 12)],
+            ['Cat 1', 'Name 1', '127.0.0.1', -120, dt(2019, 1, 1, 14)],
+            ['Cat 1', 'Name 2', 'User 1', 0, dt(2019, 1, 2, 8)],
+            ['Cat 2', 'Name 3', 'User 2', 1200, dt(2019, 1, 3, 8)],
+            ['Cat 2', 'Name 3', 'User 1', 3, dt(2019, 1, 2, 8)],],
+            columns=['category', 'pagename', 'user', 'change_size', 'date'])
+
+    def test_general_stats(self):
+        result = general_stats(self.data)
+        self.assertEqual(result, {
+            "edit_count": 5,
+            "page_count": 3,
+            "user_count": 2,
+            "anon_edit_count": 1,
+            "anon_edit_prop": 0.2,
+        })
+        self.assertEqual(general_stats(self.data[:0]), {})
+
+    def test_stats_by_category(self):
+        result = stats_by_category(self.data)
+        self.assertEqual(list(result['edit_count']), [3, 2])
+        self.assertEqual(list(result['page_count']), [2, 1])
+        self.assertEqual(list(result['user_count']), [1, 2])
+        self.assertEqual(list(result['anon_edit_prop']), [1 / 3, 0])
+
+    def test_edit_size_distribution(self):
+        counts, edges = edit_size_distribution(self.data, bins=4)
+        self.assertEqual(counts.sum(), 4)
+        self.assertEqual(len(edges), 5)
+        counts, _ = edit_size_distribution(self.data, bins=4, log=False)
+        self.assertEqual(counts.sum(), 5)
+
+    def test_inter_edit_times(self):
+        result = inter_edit_times(self.data)
+        self.assertEqual(dict(result), {('de', 'Name 1'): 7200,
+                                        ('de', 'Name 3'): 86400})
+        # Revisions crawled for another category as well are no new edits.
+        twice = pd.concat([self.data, self.data.assign(category='Cat 3')])
+        self.assertTrue(inter_edit_times(twice).equals(result))
+
+    def test_several_wikis(self):
+        """Pages of the same name in different wikis are different pages."""
+        data = pd.concat([
+            self.data.assign(wiki='de'),
+            self.data[self.data['pagename'] == 'Name 1'].assign(
+                wiki='en', date=lambda x: x['date'] + pd.Timedelta('1h')),
+        ])
+        self.assertEqual(general_stats(data)['page_count'], 4)
+        self.assertEqual(list(stats_by_category(data)['page_count']), [3, 1])
+        self.assertEqual(len(stats_by_page(data)), 4)
+        self.assertEqual(inter_edit_times(data)['en', 'Name 1'], 7200)
+        self.assertEqual(len(inter_edit_times(data)), 3)
+
+    def test_editor_activity(self):
+        result = editor_activity(self.data)
+        self.assertEqual(dict(result), {'User 1': 3, 'User 2': 1})
+
+
+class FittingTest(TestCase):
+    """Test the estimators with samples of known distributions."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def test_fit_power_law(self):
+        # Exact discrete power law samples with alpha = 2.5 and xmin = 1.
+        values = self.rng.zipf(2.5, 50000)
+        result = fit_power_law(values)
+        self.assertAlmostEqual(result['alpha'], 2.5, delta=0.03)
+        self.assertEqual(result['xmin'], 1)
+        result = fit_power_law(values, xmin=6)
+        self.assertAlmostEqual(result['alpha'], 2.5, delta=0.1)
+
+    def test_fit_power_law_xmin(self):
+        """Below the tail, the values follow another distribution."""
+        values = self.rng.zipf(2.5, 100000)
+        values = values[values >= 5]
+        noise = self.rng.integers(1, 5, size=len(values))
+        result = fit_power_law(np.concatenate([values, noise]))
+        self.assertEqual(result['xmin'], 5)
+        self.assertAlmostEqual(result['alpha'], 2.5, delta=0.1)
+
+    def test_fit_power_law_empty(self):
+        result = fit_power_law([])
+        self.assertEqual(result['n'], 0)
+        self.assertTrue(np.isnan(result['alpha']))
+
+    def test_fit_lognormal(self):
+        values = self.rng.lognormal(mean=1.5, sigma=0.5, size=50000)
+        result = fit_lognormal(values)
+        self.assertAlmostEqual(result['mu'], 1.5, delta=0.02)
+        self.assertAlmostEqual(result['sigma'], 0.5, delta=0.02)
+
+    def test_bootstrap_ci(self):
+        values = self.rng.normal(loc=3, size=1000)
+        low, high = bootstrap_ci(values, n_resamples=2000, seed=1)
+        self.assertLess(low, values.mean())
+        self.assertGreater(high, values.mean())
+        self.assertAlmostEqual(high - low, 2 * 1.96 / np.sqrt(1000),
+                               delta=0.03)
+        # The result only depends on the seed, not on the batching.
+        with patch('lib.stats.BOOTSTRAP_BATCH_SIZE', 300 * len(values)):
+            same = bootstrap_ci(values, n_resamples=2000, seed=1)
+        self.assertEqual((low, high), same)
@@ -0,0 +1,86 @@
+from unittest import TestCase
+from datetime import datetime as dt
+import os
+import tempfile
+
+from pandas import DataFrame
+
+from lib.timeseries import TimeSeriesIndex, anon_share
+
+
+class TimeSeriesIndexTest(TestCase):
+    """Test building and querying a `TimeSeriesIndex`."""
+
+    def setUp(self):
+        data = DataFrame([
+            ['Cat 1', 'Name 1', 'User 1', 12, dt(2019, 1, 1, 12), False],
+            ['Cat 1', 'Name 1', '127.0.0.1', -12, dt(2019, 1, 1, 14), True],
+            ['Cat 1', 'Name 1', 'User 2', 30, dt(2019, 1, 9, 8), False],
+            ['Cat 1', 'Name 2', 'User 1', 5, dt(2019, 1, 2, 8), False],
+            ['Cat 2', 'Name 3', '127.0.0.1', 7, dt(2019, 1, 3, 8), False],],
+            columns=['category', 'pagename', 'user', 'change_size', 'date',
+                     'revert'])
+        self.index = TimeSeriesIndex.build(data)
+
+    def test_page_daily(self):
+        series = self.index.page('Name 1')
+        self.assertEqual(list(series['edits']), [2, 1])
+        self.assertEqual(list(series['anon_edits']), [1, 0])
+        self.assertEqual(list(series['reverts']), [1, 0])
+        self.assertEqual(list(series['net_change']), [0, 30])
+
+    def test_page_range(self):
+        series = self.index.page('Name 1', start='2019-01-05')
+        self.assertEqual(list(series['edits']), [1])
+
+    def test_category_weekly(self):
+        series = self.index.category('Cat 1', freq='W')
+        self.assertEqual(list(series['edits']), [3, 1])
+        self.assertEqual(list(anon_share(series)), [1 / 3, 0])
+
+    def test_several_categories(self):
+        """A revision crawled for two categories counts once for the page,
+        and once for each category.
+        """
+        rows = [
+            ['Name 4', 'User 1', 5, dt(2019, 2, 1, 8), False],
+            ['Name 4', 'User 2', 6, dt(2019, 2, 2, 8), False],
+        ]
+        data = DataFrame(
+            [['Cat 1'] + row for row in rows] + [['Cat 3'] + row for row in rows],
+            columns=['category', 'pagename', 'user', 'change_size', 'date',
+                     'revert'])
+        index = TimeSeriesIndex.build(data)
+        self.assertEqual(list(index.page('Name 4')['edits']), [1, 1])
+        self.assertEqual(list(index.category('Cat 1')['edits']), [1, 1])
+        self.assertEqual(list(index.category('Cat 3')['edits']), [1, 1])
+
+    def test_several_wikis(self):
+        """Pages of the same name in different wikis are kept apart."""
+        data = DataFrame([
+            ['de', 'Cat 1', 'Name 1', 'User 1', 5, dt(2019, 2, 1, 8), False],
+            ['en', 'Cat 4', 'Name 1', 'User 1', 5, dt(2019, 2, 1, 8), False],
+            ['en', 'Cat 4', 'Name 1', 'User 2', 6, dt(2019, 2, 2, 8), False],],
+            columns=['wiki', 'category', 'pagename', 'user', 'change_size',
+                     'date', 'revert'])
+        index = TimeSeriesIndex.build(data)
+        self.assertEqual(list(index.page('Name 1')['edits']), [1])
+        self.assertEqual(
+            list(index.page('Name 1', wiki='en')['edits']), [1, 1])
+        self.assertEqual(list(index.pages),
+                         [('de', 'Name 1'), ('en', 'Name 1')])
+
+    def test_unknown_page(self):
+        series = self.index.page('Unknown')
+        self.assertEqual(len(series), 0)
+
+    def test_save_and_load(self):
+        fd, fn = tempfile.mkstemp(suffix='.pkl')
+        os.close(fd)
+        try:
+            self.index.save(fn)
+            loaded = TimeSeriesIndex.load(fn)
+        finally:
+            os.remove(fn)
+        self.assertEqual(list(loaded.categories), ['Cat 1', 'Cat 2'])
+        self.assertTrue(loaded.page('Name 2').equals(self.index.page('Name 2')))
@@ -31,7 +31,12 @@ ROBOTSTXT_OBEY = False
 # See also autothrottle settings and docs
 DOWNLOAD_DELAY = 3
 # The download delay setting will honor only one of:
-#CONCURRENT_REQUESTS_PER_DOMAIN = 16
+# Scrapy keeps one download slot per host, so with several wikis in one
+# crawl (e.g. `-a wikis="de,en,fr"`) each wiki is paced by DOWNLOAD_DELAY
+# on its own, while the wikis are crawled in parallel. Do not switch to
+# CONCURRENT_REQUESTS_PER_IP: all wikipedias share the same servers, which
+# would serialize them again.
+CONCURRENT_REQUESTS_PER_DOMAIN = 1
 #CONCURRENT_REQUESTS_PER_IP = 16
 
 # Disable cookies (enabled by default)
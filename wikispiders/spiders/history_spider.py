@@ -6,6 +6,8 @@ import re
 
 import scrapy
 
+from lib.locales import DEFAULT_LANG, LOCALES
+
 # Ignore revisions older than 4 years.
 MAX_DAYS_AGE = 1460
 
@@ -14,16 +16,24 @@ class HistorySpider(scrapy.Spider):
     name = "history"
     now = datetime.now()
 
+    async def start(self):
+        # Scrapy >= 2.13 only calls `start()`, older versions only
+        # `start_requests()`.
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self):
-        template = 'https://de.wikipedia.org/wiki/Kategorie:{}'
-        # Default value, if there were no command line arguments.
+        # Default values, if there were no command line arguments.
+        wikis = getattr(self, 'wikis', DEFAULT_LANG).split(',')
         categories = getattr(self, 'cats', 'Geschichte_der_Malerei,Rechtsextremismus,Kernenergie,Mathematik')
         #categories = 'Altes_Ägypten'
         categories = categories.split(',')
 
-        for cat in categories:
-            url = template.format(cat)
+        for lang, cat in self._categories_by_wiki(wikis, categories):
+            url = '{}/wiki/{}:{}'.format(
+                self._base_url(lang), LOCALES[lang].category_prefix, cat)
             request = scrapy.Request(url=url, callback=self.parse_category)
+            request.meta['wiki'] = lang
             request.meta['category'] = cat
             yield request
 
@@ -32,16 +42,18 @@ class HistorySpider(scrapy.Spider):
         #     'https://de.wikipedia.org/w/index.php?title='
         #     &offset=<datetime>&limit=<Anzahl%20an%20%C3%84nderungen>&action=history'
         # baseurl = response.url
+        lang = response.meta['wiki']
         urlpaths = response.css('div#mw-pages li a::attr(href)').extract()
         for path in urlpaths:
             pagename = path.split('/')[-1]
             history_url = ''.join([
-                'https://de.wikipedia.org/w/index.php?title=',
+                self._base_url(lang), '/w/index.php?title=',
                 pagename,
                 '&action=history'
             ])
             # print(history_url)
             request = scrapy.Request(url=history_url, callback=self.parse_history)
+            request.meta['wiki'] = lang
             request.meta['category'] = response.meta['category']
             request.meta['pagename'] = pagename
             request.meta['subcat'] = response.meta.get('subcat', None)
@@ -51,9 +63,10 @@ class HistorySpider(scrapy.Spider):
             subcats = response.css('div#mw-subcategories li a::attr(href)').extract()
             
             for path in subcats:
-                url = 'https://de.wikipedia.org' + path
+                url = response.urljoin(path)
                 pagename = path.split('/')[-1]
                 request = scrapy.Request(url=url, callback=self.parse_category)
+                request.meta['wiki'] = lang
                 request.meta['category'] = response.meta['category']
                 request.meta['subcat'] = pagename
                 yield request
@@ -64,8 +77,10 @@ class HistorySpider(scrapy.Spider):
         offset = self._parse_offset(response.url)
         if offset and (self.now - offset).days > MAX_DAYS_AGE:
             return
+        lang = response.meta.get('wiki', DEFAULT_LANG)
 
         for item in response.css('ul#pagehistory li'):
+            revid = item.css('::attr(data-mw-revid)').extract_first()
             user = item.css('span.history-user bdi::text').extract_first()
             # can be both <span> and <a>
             date = item.css('.mw-changeslist-date::text').extract_first() 
@@ -78,8 +93,10 @@ class HistorySpider(scrapy.Spider):
             # to previous versions, but these are often times not present.
             # So we need to use heuristics to find out if a given version is 
             # a revert.
-            revert = self._check_if_revert(item)
+            revert = self._check_if_revert(item, lang)
             yield {
+                'wiki': lang,
+                'revid': int(revid) if revid else None,
                 'user': user,
                 'date': date,
                 'minor': minor,
@@ -92,9 +109,12 @@ class HistorySpider(scrapy.Spider):
             }
         # After parsing all the revision items, look if there is another page 
         # in the page history.
-        next_page = response.css('div#mw-content-text a.mw-nextlink').extract_first()
+        next_page = response.css('div#mw-content-text a.mw-nextlink::attr(href)').extract_first()
         if next_page is not None:
-            yield response.follow(next_page, callback=self.parse_history)          
+            meta = {key: response.meta.get(key)
+                    for key in ('wiki', 'category', 'subcat', 'pagename')}
+            yield response.follow(next_page, callback=self.parse_history,
+                                  meta=meta)
 
     def _parse_offset(self, url):
         """Offset strings are of the form `yyyymmddhhmmss`."""
@@ -108,7 +128,34 @@ class HistorySpider(scrapy.Spider):
             dt = None    
         return dt
     
-    def _check_if_revert(self, item):
+    def _base_url(self, lang):
+        """Scheme and host of a wiki. They can be overridden with e.g.
+        `-a hosts="de=http://localhost:8000"`, to crawl a local replay of
+        the wiki instead (see `test/replay.py`).
+        """
+        if not hasattr(self, '_base_urls'):
+            self._base_urls = {
+                lang: 'https://' + locale.host
+                for lang, locale in LOCALES.items()}
+            for override in filter(None, getattr(self, 'hosts', '').split(',')):
+                key, _, url = override.partition('=')
+                self._base_urls[key] = url.rstrip('/')
+        return self._base_urls[lang]
+
+    def _categories_by_wiki(self, wikis, categories):
+        """Yield `(lang, category)` pairs. Categories can be restricted to a
+        single wiki with a language prefix like `en:Nuclear_power`, all
+        others are crawled in every wiki of `wikis`.
+        """
+        for cat in categories:
+            lang, _, name = cat.partition(':')
+            if name and lang in LOCALES:
+                yield lang, name
+            else:
+                for lang in wikis:
+                    yield lang, cat
+
+    def _check_if_revert(self, item, lang=DEFAULT_LANG):
         """Heuristic to check if a given listitem is a revert of a previous
         edit.
         """
@@ -120,6 +167,7 @@ class HistorySpider(scrapy.Spider):
         comment = item.css('span.comment::text').extract_first()
         if comment is not None:
             comment = comment.lower()
-            revert = ('rückgängig' in comment or 'zurückgesetzt' in comment)
+            revert = any(keyword in comment
+                         for keyword in LOCALES[lang].revert_keywords)
         return revert
 